@@ -1,7 +1,10 @@
 import pdfplumber
 import re
+import sys
+import json
 from datetime import time
 from collections import defaultdict
+from typing import NamedTuple
 import io
 
 # ---------------- REGEX ----------------
@@ -38,19 +41,37 @@ def to_minutes(t):
 def from_minutes(m):
     return f"{m//60:02d}:{m%60:02d}"
 
+# ---------------- RECORDS ----------------
+
+class Segment(NamedTuple):
+    """
+    One (course, slot, faculty, day, time) row. Tuple-backed so a catalog of
+    thousands of rows carries no per-row dict; string fields are interned so
+    repeated course names / faculties / days share one object.
+    """
+    course_name: str
+    course_code: str
+    credits: str
+    faculty: str
+    slot: str
+    day: str
+    start: int  # minutes since midnight
+    end: int
+
 # ---------------- PDF PARSING ----------------
 
 def extract_text_from_bytes(file_bytes):
-    text = ""
+    pages = []
     with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
         for page in pdf.pages:
             extracted = page.extract_text()
             if extracted:
-                text += extracted + "\n"
-    return text
+                pages.append(extracted + "\n")
+    return "".join(pages)
 
 def parse_pdf_text(text):
     rows = []
+    intern = sys.intern
 
     current_course = {}
     current_slot = None
@@ -67,8 +88,8 @@ def parse_pdf_text(text):
         header = COURSE_HEADER.match(line)
         if header:
             current_course = {
-                "Course Code": header.group(1),
-                "Credits": header.group(2),
+                "Course Code": intern(header.group(1)),
+                "Credits": intern(header.group(2)),
                 "Course Name": ""
             }
             current_slot = None
@@ -85,7 +106,7 @@ def parse_pdf_text(text):
         # ---- COURSE NAME ----
         if line == "Course overview":
             if i + 1 < len(lines):
-                current_course["Course Name"] = lines[i + 1]
+                current_course["Course Name"] = intern(lines[i + 1])
                 i += 2
             else:
                 i += 1
@@ -103,8 +124,8 @@ def parse_pdf_text(text):
         # Try new format first (UG - XX, SLOT, DEPT - FACULTY)
         slot_match = SLOT_FACULTY_PATTERN_NEW.match(line)
         if slot_match:
-            current_slot = slot_match.group(1)
-            current_faculty = slot_match.group(2)
+            current_slot = intern(slot_match.group(1))
+            current_faculty = intern(slot_match.group(2))
             skip_phase = False
             i += 1
             continue
@@ -112,8 +133,8 @@ def parse_pdf_text(text):
         # Fall back to old format (SLOT, FACULTY)
         slot_match = SLOT_FACULTY_PATTERN_OLD.match(line)
         if slot_match:
-            current_slot = slot_match.group(1)
-            current_faculty = slot_match.group(2)
+            current_slot = intern(slot_match.group(1))
+            current_faculty = intern(slot_match.group(2))
             skip_phase = False
             i += 1
             continue
@@ -121,72 +142,63 @@ def parse_pdf_text(text):
         # ---- DAY + MULTI TIME ----
         day_match = DAY_PATTERN.match(line)
         if day_match and current_course.get("Course Code") and current_slot and not skip_phase:
-            day = day_match.group(1)
+            day = intern(day_match.group(1))
             times = TIME_PAIR_PATTERN.findall(line)
 
             for start, end in times:
                 if is_valid_time(start, end):
-                    rows.append({
-                        "Course Name": current_course.get("Course Name", "Unknown"),
-                        "Course Code": current_course["Course Code"],
-                        "Credits": current_course["Credits"],
-                        "Faculty Name": current_faculty,
-                        "Slot Name": current_slot,
-                        "Day": day,
-                        "Start": start,
-                        "End": end
-                    })
+                    rows.append(Segment(
+                        current_course.get("Course Name", "Unknown"),
+                        current_course["Course Code"],
+                        current_course["Credits"],
+                        current_faculty,
+                        current_slot,
+                        day,
+                        to_minutes(start),
+                        to_minutes(end)
+                    ))
 
         i += 1
     
     print(f"[INFO] PDF extraction complete: {len(rows)} course slots found")
     return rows
 
-def merge_slots(rows):
+def _segment_dict(seg):
+    return {
+        "course_name": seg.course_name,
+        "course_code": seg.course_code,
+        "credits": seg.credits,
+        "faculty": seg.faculty,
+        "slot": seg.slot,
+        "day": seg.day,
+        "start_time": from_minutes(seg.start),
+        "end_time": from_minutes(seg.end)
+    }
+
+def format_output(segments):
     """
-    Converts raw rows to the tuple format expected by format_output,
-    without merging contiguous time slots. This ensures the frontend
-    receives granular 1-hour slots for its grid.
+    Formats segments into a structured list of dictionaries
+    ready for the API response.
     """
-    final = []
-    for r in rows:
-        key = (
-            r["Course Name"],
-            r["Course Code"],
-            r["Credits"],
-            r["Faculty Name"],
-            r["Slot Name"],
-            r["Day"]
-        )
-        start = to_minutes(r["Start"])
-        end = to_minutes(r["End"])
-        final.append((*key, start, end))
-
-    return final
-
-def format_output(merged_rows):
+    # The CSP solver will group them into options; we just return the flat list.
+    return [_segment_dict(seg) for seg in segments]
+
+def courses_json(segments):
     """
-    Formats the merged rows into a structured list of dictionaries
-    ready for the API response.
+    Encodes {"courses": [...]} straight from segments, one small dict at a
+    time, so the full list of dicts never exists alongside the records.
     """
-    courses = []
-    
-    # We want to group by Course Code to present a cleaner structure if needed,
-    # but for now, let's just return the flat list of available slots/options.
-    # The CSP solver will need to group them.
-    
-    for (name, code, credits, faculty, slot, day, start, end) in merged_rows:
-        courses.append({
-            "course_name": name,
-            "course_code": code,
-            "credits": credits,
-            "faculty": faculty,
-            "slot": slot,
-            "day": day,
-            "start_time": from_minutes(start),
-            "end_time": from_minutes(end)
-        })
-    return courses
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    return '{"courses":[' + ",".join(encode(_segment_dict(seg)) for seg in segments) + "]}"
+
+def extract_segments(file_bytes):
+    """
+    Compact variant of extract_courses for the upload endpoints.
+    """
+    return parse_pdf_text(extract_text_from_bytes(file_bytes))
+
+def extract_segments_from_text(text):
+    return parse_pdf_text(text)
 
 def extract_courses(file_bytes):
     """
@@ -199,6 +211,4 @@ def extract_courses_from_text(text):
     """
     Main entry point for API (Text Paste).
     """
-    raw_rows = parse_pdf_text(text)
-    merged = merge_slots(raw_rows)
-    return format_output(merged)
+    return format_output(parse_pdf_text(text))
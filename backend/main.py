@@ -1,9 +1,12 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Response, Request, Depends
+from pydantic import BaseModel, ConfigDict, PositiveInt
 from typing import List, Dict, Optional
 import uvicorn
-from backend.extractor import extract_courses
-from backend.solver import TimetableCSP
+from backend.extractor import extract_segments, extract_segments_from_text, courses_json
+from backend.solver import TimetableCSP, InvalidCatalogError
+from backend.singleflight import SingleFlight, request_key
+from backend.profiling import RequestProfiler
+from backend.scenarios import ScenarioSolver
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI(title="PlanWizz API")
@@ -17,19 +20,62 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class FacultyConstraints(BaseModel):
+    # Unknown keys are rejected so a typo can't silently disable a limit
+    model_config = ConfigDict(extra="forbid")
+
+    max_classes_per_day: Optional[PositiveInt] = None
+    max_subjects_per_faculty: Optional[PositiveInt] = None
+
+def _limits(constraints: Optional[FacultyConstraints]) -> Dict[str, int]:
+    return constraints.model_dump(exclude_none=True) if constraints else {}
+
 class PreferenceRequest(BaseModel):
     selected_subjects: List[str]
     courses_data: List[Dict]
     leave_day: str
     preferred_faculties: Optional[Dict[str, str]] = {}
+    faculty_constraints: Optional[FacultyConstraints] = None
 
 class TextUploadRequest(BaseModel):
     text: str
 
+class Scenario(BaseModel):
+    name: Optional[str] = None
+    selected_subjects: List[str]
+    leave_day: str
+    preferred_faculties: Optional[Dict[str, str]] = {}
+    faculty_constraints: Optional[FacultyConstraints] = None
+
+class ScenarioRequest(BaseModel):
+    courses_data: List[Dict]
+    scenarios: List[Scenario]
+
+MAX_SCENARIOS = 50
+
+# Identical solves arriving together (e.g. everyone uploading the same PDF at
+# registration open) share one computation instead of each burning CPU.
+solve_flight = SingleFlight()
+compat_flight = SingleFlight()
+
+# Disabled unless PLANWIZZ_PROFILE_DIR is set (see backend/profiling.py)
+profiler = RequestProfiler.from_env()
+
+async def raw_body(http_request: Request) -> bytes:
+    # FastAPI already read the body to parse the model; Starlette hands back the cached bytes
+    return await http_request.body()
+
 @app.get("/api/health")
 def health_check():
     return {"status": "ok"}
 
+@app.get("/api/stats")
+def concurrency_stats():
+    return {
+        "generate": solve_flight.stats(),
+        "check_compatibility": compat_flight.stats()
+    }
+
 @app.post("/api/upload")
 async def upload_pdf(file: UploadFile = File(...)):
     if not file.filename.endswith('.pdf'):
@@ -37,37 +83,62 @@ async def upload_pdf(file: UploadFile = File(...)):
     
     contents = await file.read()
     try:
-        extracted_data = extract_courses(contents)
-        return {"courses": extracted_data}
+        # Records stay compact until this point; JSON is built straight from them
+        segments = extract_segments(contents)
+        return Response(content=courses_json(segments), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process PDF: {str(e)}")
 
 @app.post("/api/upload-text")
 async def upload_text(request: TextUploadRequest):
     try:
-        from backend.extractor import extract_courses_from_text
-        extracted_data = extract_courses_from_text(request.text)
-        return {"courses": extracted_data}
+        segments = extract_segments_from_text(request.text)
+        return Response(content=courses_json(segments), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process text: {str(e)}")
 
 @app.post("/api/generate")
-def generate_timetable(request: PreferenceRequest):
-    solver = TimetableCSP(
-        request.selected_subjects,
-        request.courses_data,
-        request.leave_day,
-        request.preferred_faculties
-    )
-    
-    result = solver.solve()
-    return result
+def generate_timetable(request: PreferenceRequest, body: bytes = Depends(raw_body),
+                       x_debug_profile: Optional[str] = Header(None)):
+    def run():
+        with profiler.capture("/api/generate", request, force=bool(x_debug_profile)):
+            solver = TimetableCSP(
+                request.selected_subjects,
+                request.courses_data,
+                request.leave_day,
+                request.preferred_faculties,
+                _limits(request.faculty_constraints)
+            )
+            return solver.solve()
+
+    try:
+        # A debug-profiled request runs on its own so it is always captured,
+        # rather than joining someone else's in-flight solve. With profiling
+        # off the header does nothing, so it can't be used to skip coalescing.
+        if x_debug_profile and profiler.enabled:
+            return run()
+        return solve_flight.do(request_key(body), run)
+    except InvalidCatalogError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/api/check-compatibility")
-def check_compatibility(request: PreferenceRequest):
+def check_compatibility(request: PreferenceRequest, body: bytes = Depends(raw_body),
+                        x_debug_profile: Optional[str] = Header(None)):
     """
     Returns a list of subjects that CAN be added to the current selection without causing conflict.
     """
+    def run():
+        with profiler.capture("/api/check-compatibility", request, force=bool(x_debug_profile)):
+            return _compatible_subjects(request)
+
+    try:
+        if x_debug_profile and profiler.enabled:
+            return run()
+        return compat_flight.do(request_key(body), run)
+    except InvalidCatalogError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _compatible_subjects(request: PreferenceRequest):
     # 1. Deduce all available subjects from the raw data
     all_subjects = list(set(c['course_name'] for c in request.courses_data))
     
@@ -88,7 +159,8 @@ def check_compatibility(request: PreferenceRequest):
             temp_selection,
             request.courses_data,
             request.leave_day,
-            request.preferred_faculties
+            request.preferred_faculties,
+            _limits(request.faculty_constraints)
         )
         
         if solver.is_solvable():
@@ -96,5 +168,23 @@ def check_compatibility(request: PreferenceRequest):
             
     return {"compatible_subjects": compatible_subjects}
 
+@app.post("/api/scenarios")
+def compare_scenarios(request: ScenarioRequest):
+    """
+    Solves several what-if variants against one catalog in a single call and
+    returns a side-by-side comparison plus each variant's full result.
+    """
+    if not request.scenarios:
+        raise HTTPException(status_code=400, detail="Provide at least one scenario.")
+    if len(request.scenarios) > MAX_SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SCENARIOS} scenarios per request.")
+
+    # Malformed catalog rows are reported per variant (see ScenarioSolver.solve_all)
+    scenarios = [
+        s.model_copy(update={"faculty_constraints": _limits(s.faculty_constraints)})
+        for s in request.scenarios
+    ]
+    return ScenarioSolver(request.courses_data).solve_all(scenarios)
+
 if __name__ == "__main__":
     uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
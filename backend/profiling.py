@@ -0,0 +1,296 @@
+"""
+Opt-in request profiling.
+
+Set PLANWIZZ_PROFILE_DIR to enable. Solver requests are then stack-sampled
+while they run; a capture is kept when the request is slower than
+PLANWIZZ_PROFILE_THRESHOLD_MS (default 1000) or sent the X-Debug-Profile
+header. Captures live in a bounded on-disk ring buffer
+(PLANWIZZ_PROFILE_MAX, default 50) together with the inputs needed to
+re-run them:
+
+    python -m backend.profiling list
+    python -m backend.profiling replay <capture-id>
+    python -m backend.profiling folded <capture-id> > slow.folded   # flamegraph.pl / speedscope
+"""
+import argparse
+import cProfile
+import hashlib
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+SAMPLE_INTERVAL = 0.005  # seconds
+
+logger = logging.getLogger(__name__)
+
+
+def catalog_fingerprint(courses_data: List[Dict]) -> str:
+    """
+    Stable hash of an uploaded catalog. Two students who uploaded the same PDF
+    send byte-different JSON (key order, whitespace) but get the same fingerprint,
+    so their captures share one stored catalog.
+    """
+    payload = json.dumps(courses_data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class _StackSampler(threading.Thread):
+    """
+    Periodically records the stack of one thread as a folded "a;b;c" string.
+    """
+
+    def __init__(self, target_ident: int, interval: float = SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.target_ident = target_ident
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> Dict[str, int]:
+        self._stop_event.set()
+        self.join()
+        return dict(self.stacks)
+
+
+class ProfileStore:
+    """
+    Ring buffer of captures on disk. Catalogs are stored once per fingerprint
+    and dropped when no capture references them any more.
+
+    Several workers may share the directory. Eviction leaves alone any catalog
+    touched since it started listing captures, so a concurrent save keeps its
+    catalog; only a save landing between the mtime check and the delete can
+    still lose it, and that capture then fails to replay.
+    """
+
+    def __init__(self, directory: str, max_captures: int = 50):
+        self.directory = directory
+        self.catalog_dir = os.path.join(directory, "catalogs")
+        self.max_captures = max_captures
+        self._lock = threading.Lock()
+        os.makedirs(self.catalog_dir, exist_ok=True)
+
+    def list_ids(self) -> List[str]:
+        return sorted(f[:-5] for f in os.listdir(self.directory) if f.endswith(".json"))
+
+    def load(self, capture_id: str) -> Dict:
+        with open(os.path.join(self.directory, capture_id + ".json")) as f:
+            return json.load(f)
+
+    def load_catalog(self, fingerprint: str) -> List[Dict]:
+        with open(os.path.join(self.catalog_dir, fingerprint + ".json")) as f:
+            return json.load(f)
+
+    def save(self, capture: Dict, courses_data: List[Dict]) -> str:
+        # Ids sort by time; pid + uuid keep several uvicorn workers from colliding
+        route = capture['route'].strip('/').replace('/', '_')
+        capture_id = f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}-{route}"
+        fingerprint = capture["request"]["catalog_fingerprint"]
+
+        with self._lock:
+            # Capture first, so another worker's eviction already sees the catalog as referenced
+            _write_atomic(os.path.join(self.directory, capture_id + ".json"), capture)
+            catalog_path = os.path.join(self.catalog_dir, fingerprint + ".json")
+            try:
+                # Refresh the mtime so an eviction that listed captures before ours keeps it
+                os.utime(catalog_path)
+            except FileNotFoundError:
+                _write_atomic(catalog_path, courses_data)
+            self._evict()
+        return capture_id
+
+    def _evict(self):
+        # Allow for coarse filesystem timestamps when comparing mtimes below
+        snapshot = time.time() - 1
+        ids = self.list_ids()
+        evicted = ids[:max(0, len(ids) - self.max_captures)]
+        for old in evicted:
+            _remove_quietly(os.path.join(self.directory, old + ".json"))
+        if not evicted:
+            return
+
+        # Only re-scan captures for catalog references when something was dropped
+        referenced = set()
+        for capture_id in ids[len(evicted):]:
+            try:
+                referenced.add(self.load(capture_id)["request"]["catalog_fingerprint"])
+            except (OSError, ValueError):
+                continue  # removed or half-written by another worker
+        for f in os.listdir(self.catalog_dir):
+            path = os.path.join(self.catalog_dir, f)
+            if f[:-5] in referenced:
+                continue
+            try:
+                # Touched after our listing: another worker may have just saved a capture for it
+                if os.path.getmtime(path) >= snapshot:
+                    continue
+            except FileNotFoundError:
+                continue
+            _remove_quietly(path)
+
+
+def _write_atomic(path: str, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class RequestProfiler:
+    def __init__(self, directory: Optional[str], threshold_ms: float = 1000, max_captures: int = 50):
+        self.enabled = bool(directory)
+        self.threshold_ms = threshold_ms
+        self.store = ProfileStore(directory, max_captures) if self.enabled else None
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        return cls(
+            os.environ.get("PLANWIZZ_PROFILE_DIR"),
+            float(os.environ.get("PLANWIZZ_PROFILE_THRESHOLD_MS", 1000)),
+            int(os.environ.get("PLANWIZZ_PROFILE_MAX", 50)),
+        )
+
+    @contextmanager
+    def capture(self, route: str, request, force: bool = False):
+        """
+        Wraps one solver request (a PreferenceRequest). Must run on the thread
+        doing the work, since only that thread is sampled.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        sampler = _StackSampler(threading.get_ident())
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            stacks = sampler.stop()
+            if force or elapsed_ms >= self.threshold_ms:
+                # Profiling must never fail (or mask the error of) the request itself
+                try:
+                    # Only hashed for kept captures, never on the request path
+                    fingerprint = catalog_fingerprint(request.courses_data)
+                    self.store.save({
+                        "route": route,
+                        "timestamp": time.time(),
+                        "elapsed_ms": elapsed_ms,
+                        "forced": force,
+                        "request": sanitize_request(request, fingerprint),
+                        "stacks": stacks,
+                    }, request.courses_data)
+                except Exception:
+                    logger.exception("Failed to save profile capture for %s", route)
+
+
+def sanitize_request(request, fingerprint: str) -> Dict:
+    """
+    Only the solver inputs; the catalog itself is referenced by fingerprint.
+    """
+    return {
+        "catalog_fingerprint": fingerprint,
+        "selected_subjects": list(request.selected_subjects),
+        "leave_day": request.leave_day,
+        "preferred_faculties": dict(request.preferred_faculties or {}),
+        "faculty_constraints": _plain_limits(getattr(request, "faculty_constraints", None)),
+    }
+
+
+def _plain_limits(constraints) -> Dict[str, int]:
+    if constraints is None:
+        return {}
+    if hasattr(constraints, "model_dump"):
+        return constraints.model_dump(exclude_none=True)
+    return dict(constraints)
+
+
+# ---------------- CLI ----------------
+
+def _replay(store: ProfileStore, capture_id: str, sort: str, limit: int):
+    from backend.solver import TimetableCSP
+
+    capture = store.load(capture_id)
+    req = capture["request"]
+    courses_data = store.load_catalog(req["catalog_fingerprint"])
+    print(f"Replaying {capture_id} ({capture['route']}, originally {capture['elapsed_ms']:.0f} ms)")
+
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    if capture["route"] == "/api/check-compatibility":
+        # The compatibility loop lives with the endpoint
+        from backend.main import PreferenceRequest, _compatible_subjects
+        result = _compatible_subjects(PreferenceRequest(courses_data=courses_data, **{
+            k: v for k, v in req.items() if k != "catalog_fingerprint"
+        }))
+        summary = f"{len(result['compatible_subjects'])} compatible subjects"
+    else:
+        result = TimetableCSP(req["selected_subjects"], courses_data, req["leave_day"],
+                              req["preferred_faculties"], req["faculty_constraints"]).solve()
+        summary = result["status"]
+    profiler.disable()
+
+    print(f"Result: {summary} in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+    pstats.Stats(profiler).sort_stats(sort).print_stats(limit)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and replay captured slow requests.")
+    parser.add_argument("--dir", default=os.environ.get("PLANWIZZ_PROFILE_DIR"), help="Capture directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    replay = sub.add_parser("replay")
+    replay.add_argument("capture_id")
+    replay.add_argument("--sort", default="cumulative")
+    replay.add_argument("--limit", type=int, default=25)
+    folded = sub.add_parser("folded")
+    folded.add_argument("capture_id")
+    args = parser.parse_args(argv)
+
+    if not args.dir:
+        parser.error("set PLANWIZZ_PROFILE_DIR or pass --dir")
+    store = ProfileStore(args.dir)
+
+    if args.command == "list":
+        for capture_id in store.list_ids():
+            c = store.load(capture_id)
+            print(f"{capture_id}  {c['elapsed_ms']:8.0f} ms  "
+                  f"{len(c['request']['selected_subjects'])} subjects  leave={c['request']['leave_day'] or '-'}")
+    elif args.command == "replay":
+        _replay(store, args.capture_id, args.sort, args.limit)
+    elif args.command == "folded":
+        for stack, count in store.load(args.capture_id)["stacks"].items():
+            print(f"{stack} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import json
+from collections import defaultdict
+from typing import Dict, List
+
+from backend.solver import InvalidCatalogError, OptionIndex, TimetableCSP
+
+WEEK_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+
+class ScenarioSolver:
+    """
+    Solves many what-if variants (subject bundle, leave day, preferred
+    faculties, faculty limits) against one catalog.
+
+    The catalog is grouped into options once and shared by every variant.
+    Within one context (leave day + faculty limits), a subject set with no
+    strict solution (a nogood) makes every superset infeasible too, so those
+    variants skip straight to the relaxed solve. Variants are solved
+    smallest-first so nogoods learned from small bundles (including
+    always-overlapping pairs from conflict diagnosis) prune the bigger ones.
+
+    Solutions themselves are not reused: every variant gets exactly the result
+    /api/generate would return for the same inputs.
+    """
+
+    def __init__(self, courses_data: List[Dict]):
+        self.courses_data = courses_data
+        self.option_index = OptionIndex(courses_data)
+        self._nogoods = defaultdict(list)  # context -> [subject set]
+        self.stats = {"searched": 0, "pruned": 0, "failed": 0}
+
+    def solve_all(self, scenarios) -> Dict:
+        """
+        scenarios: objects with selected_subjects, leave_day, preferred_faculties,
+        faculty_constraints (a plain dict of limits) and an optional name.
+        Results keep the input order.
+        """
+        order = sorted(range(len(scenarios)), key=lambda i: len(set(scenarios[i].selected_subjects)))
+        results = [None] * len(scenarios)
+        for i in order:
+            try:
+                results[i] = self._solve_one(scenarios[i])
+            except InvalidCatalogError as e:
+                # Bad rows only fail the variants that select those subjects,
+                # just as /api/generate would reject that selection
+                self.stats["failed"] += 1
+                results[i] = {
+                    "status": "error",
+                    "reason": str(e),
+                    "suggestion": "Check input data."
+                }
+            except Exception as e:
+                # One broken variant must not take the rest of the batch down with it
+                self.stats["failed"] += 1
+                results[i] = {
+                    "status": "error",
+                    "reason": f"Failed to solve this scenario: {str(e)}",
+                    "suggestion": "Try this combination on its own or adjust it."
+                }
+
+        comparison = []
+        for i, (scenario, result) in enumerate(zip(scenarios, results)):
+            name = getattr(scenario, "name", None) or f"Scenario {i + 1}"
+            comparison.append(_summarize(name, scenario, result))
+
+        return {"comparison": comparison, "results": results, "stats": dict(self.stats)}
+
+    def _solve_one(self, scenario):
+        preferred = scenario.preferred_faculties or {}
+        constraints = scenario.faculty_constraints or {}
+        context = (scenario.leave_day, json.dumps(constraints, sort_keys=True))
+        subjects = frozenset(scenario.selected_subjects)
+
+        solver = TimetableCSP(scenario.selected_subjects, self.courses_data, scenario.leave_day,
+                              preferred, constraints, option_index=self.option_index)
+
+        known_bad = any(nogood <= subjects for nogood in self._nogoods[context])
+        self.stats["pruned" if known_bad else "searched"] += 1
+        result = solver.solve(strict_infeasible=known_bad)
+
+        # solve() leaves self.assignment populated only when the strict search succeeded
+        if not solver.assignment and not known_bad:
+            self._nogoods[context].append(subjects)
+        for conflict in result.get("conflict_details", []):
+            if conflict.get("type") == "hard_overlap":
+                self._nogoods[context].append(frozenset(conflict["subjects"]))
+
+        return result
+
+
+def _summarize(name, scenario, result):
+    timetable = result.get("timetable") or []
+    minutes_per_day = defaultdict(int)
+    starts, ends = [], []
+    for entry in timetable:
+        start, end = (t.strip() for t in entry["time"].split("-"))
+        sh, sm = map(int, start.split(":"))
+        eh, em = map(int, end.split(":"))
+        # Compare as minutes: "9:00" sorts after "10:00" as a string
+        starts.append(sh * 60 + sm)
+        ends.append(eh * 60 + em)
+        minutes_per_day[entry["day"]] += ends[-1] - starts[-1]
+
+    return {
+        "name": name,
+        "status": result["status"],
+        "message": result.get("message") or result.get("reason"),
+        "subjects": list(scenario.selected_subjects),
+        "leave_day": scenario.leave_day,
+        "hours_per_day": {d: minutes_per_day[d] / 60 for d in WEEK_DAYS if d in minutes_per_day},
+        "total_hours": sum(minutes_per_day.values()) / 60,
+        "free_days": [d for d in WEEK_DAYS if d not in minutes_per_day] if timetable else [],
+        "earliest_start": _format_minutes(min(starts)) if starts else None,
+        "latest_end": _format_minutes(max(ends)) if ends else None,
+    }
+
+
+def _format_minutes(m):
+    return f"{m // 60:02d}:{m % 60:02d}"
@@ -0,0 +1,89 @@
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+def request_key(body: bytes) -> str:
+    """
+    Single-flight key for a JSON request: a hash of its raw body. Identical
+    requests (the same client re-sending the same catalog and selection) share
+    one solve; parsing and re-serialising a large catalog would cost more than
+    the solve itself.
+    """
+    return hashlib.sha1(body).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution.
+
+    The first caller (the "leader") runs the function; callers that arrive while
+    it is still running block until it finishes and receive the same result (or
+    the same exception). Nothing is cached once the call completes, so a later
+    request always recomputes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._executed = 0
+        self._shared = 0
+        self._errors = 0
+        self._max_in_flight = 0
+        self._max_waiters = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._shared += 1
+                self._max_waiters = max(self._max_waiters, call.waiters)
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._executed += 1
+                self._max_in_flight = max(self._max_in_flight, len(self._calls))
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            total = self._executed + self._shared
+            return {
+                "requests": total,
+                "executed": self._executed,
+                "shared": self._shared,
+                "errors": self._errors,
+                "in_flight": len(self._calls),
+                "waiting": sum(c.waiters for c in self._calls.values()),
+                "max_in_flight": self._max_in_flight,
+                "max_waiters": self._max_waiters,
+            }
@@ -1,46 +1,129 @@
+import re
 from typing import List, Dict, Optional, Any
 from collections import defaultdict
 
+TIME_FORMAT = re.compile(r"^(\d{1,2}):(\d{2})$")
+
+
+class InvalidCatalogError(ValueError):
+    """Raised when client-supplied course data can't be scheduled as given."""
+
+
+def _to_minutes(t: str) -> int:
+    h, m = map(int, t.split(":"))
+    return h * 60 + m
+
+def _validate_segment(course: Dict):
+    # courses_data comes from the client, so check times once before any bitmaps are built
+    where = f"'{course.get('course_name')}' ({course.get('slot')}, {course.get('day')})"
+    minutes = []
+    for field in ('start_time', 'end_time'):
+        value = course.get(field)
+        match = TIME_FORMAT.match(value) if isinstance(value, str) else None
+        if not match or int(match.group(2)) >= 60 or _to_minutes(value) > 24 * 60:
+            raise InvalidCatalogError(f"Invalid {field} {value!r} for {where}; expected HH:MM.")
+        minutes.append(_to_minutes(value))
+    if minutes[0] >= minutes[1]:
+        raise InvalidCatalogError(
+            f"Segment for {where} must end after it starts (got {course['start_time']} - {course['end_time']})."
+        )
+
+def _interval_mask(start: str, end: str) -> int:
+    # One bit per minute of the day; two intervals overlap iff their masks intersect
+    s, e = _to_minutes(start), _to_minutes(end)
+    return ((1 << (e - s)) - 1) << s
+
+
+class OptionIndex:
+    """
+    A catalog grouped once into options: subject -> list of options, where an
+    option is the segment list of one (course, slot, faculty) group, in catalog
+    order. Can be shared by many solvers over the same catalog, along with the
+    footprint cache for its options.
+    """
+
+    def __init__(self, courses_data: List[Dict], subjects: Optional[List[str]] = None):
+        grouped_options = defaultdict(list)
+        for course in courses_data:
+            if subjects is not None and course['course_name'] not in subjects:
+                continue
+            # Key = (Course, SlotName, Faculty)
+            # We must group by Faculty too because sometimes different faculties teach the same slot name? 
+            # Or usually SlotName is unique. Let's group by Slot+Faculty to be safe and distinct.
+            key = (course['course_name'], course['slot'], course['faculty'])
+            grouped_options[key].append(course)
+
+        self._options = defaultdict(list)
+        for (subject, _, _), segments in grouped_options.items():
+            self._options[subject].append(segments)
+        self._validated = set()
+
+        # id(option) -> (option, footprint); see TimetableCSP._footprint
+        self.footprints = {}
+
+    def options_for(self, subject: str) -> List[List[Dict]]:
+        """
+        Options for one subject. Its segments are validated the first time it
+        is asked for, so a bad row only affects selections that include it.
+        """
+        options = self._options.get(subject, [])
+        if subject not in self._validated:
+            for segments in options:
+                for course in segments:
+                    _validate_segment(course)
+            self._validated.add(subject)
+        return options
+
+
 class TimetableCSP:
-    def __init__(self, selected_subjects: List[str], courses_data: List[Dict], leave_day: str, preferred_faculties: Dict[str, str]):
+    """
+    Backtracking CSP over (subject -> option) where an option is every segment
+    of one (course, slot, faculty) group.
+
+    faculty_constraints (all optional):
+        max_classes_per_day: max classes per day this student takes with one
+            faculty (only this timetable is counted, not the faculty's whole load)
+        max_subjects_per_faculty: max selected subjects taken with one faculty,
+            which spreads a student's subjects across faculties/sections.
+            Balancing load across sections would need enrollment counts, which
+            the catalog doesn't carry.
+    """
+
+    def __init__(self, selected_subjects: List[str], courses_data: List[Dict], leave_day: str, preferred_faculties: Dict[str, str],
+                 faculty_constraints: Optional[Dict[str, int]] = None, option_index: Optional[OptionIndex] = None):
         self.selected_subjects = selected_subjects
         self.courses_data = courses_data
         self.leave_day = leave_day
         self.preferred_faculties = preferred_faculties
+        self.faculty_constraints = faculty_constraints or {}
+        # Pass a shared index when solving many selections over one catalog
+        self.option_index = option_index or OptionIndex(courses_data, selected_subjects)
         
         # Organize domains: Subject -> List of valid slots
         self.domains = self._build_domains()
         self.assignment = {}  # Subject -> Slot
         self.conflicts = []
 
-    def _build_domains(self):
-        # 1. Group raw data by (Course, Slot, Faculty) to form atomic "Options"
-        # Each option is a LIST of segments (e.g. [Mon 8-9, Wed 10-11])
-        grouped_options = defaultdict(list)
-        
-        for course in self.courses_data:
-            if course['course_name'] not in self.selected_subjects:
-                continue
-                
-            # Key = (Course, SlotName, Faculty)
-            # We must group by Faculty too because sometimes different faculties teach the same slot name? 
-            # Or usually SlotName is unique. Let's group by Slot+Faculty to be safe and distinct.
-            key = (course['course_name'], course['slot'], course['faculty'])
-            grouped_options[key].append(course)
+        # Option footprints are computed once per option (id -> (option, footprint));
+        # the option itself is kept so its id can't be recycled.
+        self._footprints = self.option_index.footprints
+        self._reset_index()
 
-        # 2. Convert groups to domains
+    def _build_domains(self, respect_leave_day=True):
+        # Each option is a LIST of segments (e.g. [Mon 8-9, Wed 10-11])
         domains = defaultdict(list)
         
-        for (subject, slot, faculty), segments in grouped_options.items():
-            # Check Hard Constraint: Leave Day
-            # If ANY segment falls on the leave day, this ENTIRE option is invalid
-            if any(seg['day'] == self.leave_day for seg in segments):
-                continue
-            
-            # This 'value' is now a list of dicts
-            domains[subject].append(segments)
+        for subject in dict.fromkeys(self.selected_subjects):
+            for segments in self.option_index.options_for(subject):
+                # Check Hard Constraint: Leave Day
+                # If ANY segment falls on the leave day, this ENTIRE option is invalid
+                if respect_leave_day and any(seg['day'] == self.leave_day for seg in segments):
+                    continue
+                
+                # This 'value' is now a list of dicts
+                domains[subject].append(segments)
 
-        # 3. Sort domains based on preferences
+        # Sort domains based on preferences
         for subject in domains:
             preferred = self.preferred_faculties.get(subject)
             if preferred:
@@ -49,7 +132,12 @@ class TimetableCSP:
                 
         return domains
 
-    def solve(self):
+    def solve(self, strict_infeasible: bool = False):
+        """
+        strict_infeasible: the caller knows no strict (leave-day respecting)
+            assignment exists, e.g. from a smaller selection over the same
+            catalog, so go straight to the relaxed solve / conflict report.
+        """
         # 1. Validation checks
         for subject in self.selected_subjects:
             if subject not in self.domains or not self.domains[subject]:
@@ -90,7 +178,7 @@ class TimetableCSP:
             debug_domains[subj] = flat_slots
 
         # 2. Strict Solve (Respected Leave Day, but might have swapped Faculty)
-        if self._backtrack():
+        if not strict_infeasible and self._backtrack():
             # Check if we adhered to faculty preferences
             changes = []
             for subj, segments in self.assignment.items():
@@ -126,6 +214,22 @@ class TimetableCSP:
             }
             
         # 4. Conflict Msg
+        # If the faculty limits are the only thing in the way, say so; the
+        # overlap diagnostics below know nothing about them.
+        if any(self.faculty_constraints.values()) and self._solvable_without_faculty_limits():
+            limits = ", ".join(f"{k} = {v}" for k, v in self.faculty_constraints.items() if v)
+            return {
+                "status": "conflict",
+                "reason": "Scheduling conflict detected.",
+                "conflict_details": [{
+                    "type": "faculty_limit",
+                    "limits": {k: v for k, v in self.faculty_constraints.items() if v},
+                    "message": f"These subjects fit together, but not within your faculty limits ({limits})."
+                }],
+                "suggestion": "Raise or remove your faculty limits to get a timetable.",
+                "all_possible_slots": debug_domains
+            }
+
         conflict_info = self._diagnose_conflict_detailed()
         return {
             "status": "conflict",
@@ -204,80 +308,182 @@ class TimetableCSP:
         original_assignment = self.assignment.copy()
         
         # Rebuild domains without filtering leave day
-        grouped_options = defaultdict(list)
-        for course in self.courses_data:
-            if course['course_name'] in self.selected_subjects:
-                key = (course['course_name'], course['slot'], course['faculty'])
-                grouped_options[key].append(course)
-        
-        new_domains = defaultdict(list)
-        for (subject, _, faculty), segments in grouped_options.items():
-            new_domains[subject].append(segments)
-            
-        # Sort
-        for subject in new_domains:
-            preferred = self.preferred_faculties.get(subject)
-            if preferred:
-                new_domains[subject].sort(key=lambda segs: 0 if segs[0]['faculty'] == preferred else 1)
-
-        self.domains = new_domains
+        self.domains = self._build_domains(respect_leave_day=False)
         self.assignment = {}
+        self._reset_index()
         
         if self._backtrack():
             res = self._format_assignment()
             self.domains = original_domains
             self.assignment = original_assignment
+            self._reset_index()
             return res
             
         self.domains = original_domains
         self.assignment = original_assignment
+        self._reset_index()
         return None
 
+    def _solvable_without_faculty_limits(self):
+        """
+        Checks the strict (leave-day respecting) problem with faculty limits
+        switched off, leaving the solver state as it was.
+        """
+        original_constraints = self.faculty_constraints
+        original_assignment = self.assignment.copy()
+        self.faculty_constraints = {}
+        self.assignment = {}
+        self._reset_index()
+        try:
+            return self._backtrack()
+        finally:
+            self.faculty_constraints = original_constraints
+            self.assignment = original_assignment
+            self._reset_index()
+
     def _backtrack(self):
+        """
+        Searches over equivalence classes of options instead of every option:
+        options of a subject that book exactly the same minutes (and, when
+        faculty limits are set, have the same faculty) are interchangeable, so
+        only the first of each class, in preference order, is ever tried.
+        Leaves the solution in self.assignment and returns True, or returns
+        False with it untouched.
+        """
+        self._classes = {s: self._time_classes(self.domains[s]) for s in self.selected_subjects}
+        self.nodes_explored = 0
+        return self._search_classes()
+
+    def _search_classes(self):
         if len(self.assignment) == len(self.selected_subjects):
             return True
 
+        self.nodes_explored += 1
         unassigned = [s for s in self.selected_subjects if s not in self.assignment]
-        # MCV: Pick variable with fewest options
-        var = min(unassigned, key=lambda s: len(self.domains[s]))
+        # MCV: Pick variable with fewest distinct options
+        var = min(unassigned, key=lambda s: len(self._classes[s]))
 
-        # 'value' is a LIST of segments
-        for value in self.domains[var]:
+        # Faculty limits are checked here too, so they prune as the search goes
+        for value in self._classes[var]:
             if self._is_consistent(var, value):
-                self.assignment[var] = value
-                if self._backtrack():
+                self._assign(var, value)
+                if self._search_classes():
                     return True
-                del self.assignment[var]
-        
+                self._unassign(var)
+
         return False
 
+    def _time_classes(self, options):
+        """
+        Returns one representative option per equivalence class (see
+        _backtrack), ordered by first occurrence in the domain so preference
+        order is kept, after dropping dominated classes.
+
+        A class is dominated when an earlier class occupies a strict subset of its
+        minutes: whenever the later class fits, the earlier one fits too and is
+        tried first, so the later one can never be chosen. With faculty limits
+        the smaller class may still fail on faculty, so nothing is dropped then.
+        """
+        limited = any(self.faculty_constraints.values())
+        classes = {}
+        for value in options:
+            faculty, masks, counts = self._footprint(value)
+            key = tuple(sorted(masks.items()))
+            if limited:
+                # With limits, the faculty and its load decide feasibility as much as the timing
+                key = (key, faculty, tuple(sorted(counts.items())))
+            classes.setdefault(key, value)
+
+        if limited:
+            return list(classes.values())
+
+        kept = []  # (masks, representative)
+        for key, value in classes.items():
+            masks = dict(key)
+            dominated = any(
+                all(mask & ~masks.get(day, 0) == 0 for day, mask in earlier.items())
+                for earlier, _ in kept
+            )
+            if not dominated:
+                kept.append((masks, value))
+        return [value for _, value in kept]
+
+    # ---------------- OCCUPANCY INDEX ----------------
+
+    def _footprint(self, value_segments):
+        """
+        Returns (faculty, {day: minute bitmap}, {day: segment count}) for an option.
+        """
+        cached = self._footprints.get(id(value_segments))
+        if cached is not None:
+            return cached[1]
+
+        masks = defaultdict(int)
+        counts = defaultdict(int)
+        for seg in value_segments:
+            masks[seg['day']] |= _interval_mask(seg['start_time'], seg['end_time'])
+            counts[seg['day']] += 1
+        footprint = (value_segments[0]['faculty'], dict(masks), dict(counts))
+        self._footprints[id(value_segments)] = (value_segments, footprint)
+        return footprint
+
+    def _reset_index(self):
+        """
+        Rebuilds the occupancy index from self.assignment. Used whenever the
+        assignment is replaced wholesale rather than extended one variable at a time.
+        """
+        self._busy = defaultdict(int)  # day -> bitmap of the student's booked minutes
+        self._faculty_load = defaultdict(lambda: defaultdict(int))  # faculty -> day -> segment count
+        self._faculty_subjects = defaultdict(int)  # faculty -> number of assigned subjects
+        for value in self.assignment.values():
+            self._index_add(value)
+
+    def _index_add(self, value_segments):
+        faculty, masks, counts = self._footprint(value_segments)
+        for day, mask in masks.items():
+            self._busy[day] |= mask
+        for day, count in counts.items():
+            self._faculty_load[faculty][day] += count
+        self._faculty_subjects[faculty] += 1
+
+    def _index_remove(self, value_segments):
+        # Options assigned at the same time never overlap, so clearing bits is exact
+        faculty, masks, counts = self._footprint(value_segments)
+        for day, mask in masks.items():
+            self._busy[day] &= ~mask
+        for day, count in counts.items():
+            self._faculty_load[faculty][day] -= count
+        self._faculty_subjects[faculty] -= 1
+
+    def _assign(self, var, value_segments):
+        self.assignment[var] = value_segments
+        self._index_add(value_segments)
+
+    def _unassign(self, var):
+        self._index_remove(self.assignment.pop(var))
+
     def _is_consistent(self, var, value_segments):
         # value_segments is List of Dicts (the full schedule for this slot)
-        
-        for assigned_var, assigned_segments in self.assignment.items():
-            # assigned_segments is also a List of Dicts
-            
-            # Check EVERY segment against EVERY assigned segment
-            for new_seg in value_segments:
-                for existing_seg in assigned_segments:
-                    
-                    # 1. Day Overlap Check
-                    if new_seg['day'] == existing_seg['day']:
-                        if self._check_overlap(new_seg['start_time'], new_seg['end_time'],
-                                               existing_seg['start_time'], existing_seg['end_time']):
-                            return False
-                    
-                    # 2. Faculty Overlap
-                    # If same faculty, they cannot overlap in time (handled above)
-                    # BUT strictly speaking, if it's the SAME faculty but DIFFERENT classes, 
-                    # and they overlap, that's impossible for the faculty.
-                    # (Though if data is valid, a faculty won't be doubled booked. 
-                    # But we must ensure WE don't book same faculty twice at same time).
-                    if new_seg['faculty'] == existing_seg['faculty']:
-                         if new_seg['day'] == existing_seg['day']:
-                            if self._check_overlap(new_seg['start_time'], new_seg['end_time'],
-                                                   existing_seg['start_time'], existing_seg['end_time']):
-                                return False
+        faculty, masks, counts = self._footprint(value_segments)
+
+        # 1. Time clash. This also rules out double-booking a faculty: two classes
+        # with the same faculty at the same time would clash for the student first.
+        for day, mask in masks.items():
+            if self._busy[day] & mask:
+                return False
+
+        # 2. Faculty capacity
+        max_per_day = self.faculty_constraints.get("max_classes_per_day")
+        if max_per_day:
+            load = self._faculty_load.get(faculty, {})
+            for day, count in counts.items():
+                if load.get(day, 0) + count > max_per_day:
+                    return False
+
+        max_subjects = self.faculty_constraints.get("max_subjects_per_faculty")
+        if max_subjects and self._faculty_subjects.get(faculty, 0) >= max_subjects:
+            return False
+
         return True
 
     def _check_overlap(self, start1, end1, start2, end2):
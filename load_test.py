@@ -0,0 +1,397 @@
+"""
+Local load-test harness for the PlanWizz API.
+
+Replays registration-day style traffic against backend.main:app, either
+in-process (default, no server needed) or against a locally running uvicorn
+(--url http://localhost:8000). Each virtual student:
+
+    1. uploads an enrollment PDF (/api/upload) or pastes its text (/api/upload-text)
+    2. toggles subjects / leave day like App.jsx; a /api/check-compatibility call
+       only fires once input has been idle for the 500 ms debounce window
+    3. generates the timetable (/api/generate)
+
+Usage:
+    python load_test.py --users 50 --catalogs 3
+    python load_test.py --users 50 --save-baseline baseline.json
+    python load_test.py --users 50 --baseline baseline.json   # exit 1 on regression
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+FIRST_NAMES = ["ARUN", "PRIYA", "KAVYA", "RAHUL", "DIVYA", "KARTHIK", "MEENA", "SURESH"]
+SUBJECT_WORDS = ["Data", "Structures", "Networks", "Systems", "Machine", "Learning", "Signals",
+                 "Design", "Analysis", "Theory", "Applied", "Mechanics", "Thermal", "Digital"]
+
+DEBOUNCE_MS = 500  # App.jsx compatibility-check debounce
+
+
+# ---------------- SYNTHETIC CATALOGS ----------------
+
+def synthetic_catalog_text(seed, n_courses=20, sections=4):
+    """
+    Enrollment text in the format parse_pdf_text understands. Sections of a
+    course often share timings (as in real PDFs), differing only by faculty.
+    """
+    rnd = random.Random(seed)
+    lines = []
+    for c in range(n_courses):
+        code = f"23{rnd.choice(['CS', 'EC', 'ME', 'MA'])}{c:03d}"
+        name = " ".join(rnd.sample(SUBJECT_WORDS, 2)) + f" {c}"
+        lines += [f"{code} [{rnd.choice([2, 3, 4])} Credits]", "PROFESSIONAL CORE", "Course overview", name]
+
+        timings = [
+            [(rnd.choice(DAYS[:5]), rnd.randint(8, 16)) for _ in range(rnd.randint(2, 3))]
+            for _ in range(max(1, sections // 2))
+        ]
+        for s in range(sections):
+            faculty = f"{rnd.choice(FIRST_NAMES)} {chr(65 + rnd.randint(0, 25))}"
+            lines.append(f"T{s + 1}-{chr(65 + c % 26)}{s + 1}, {faculty}")
+            by_day = defaultdict(list)
+            for day, hour in timings[s % len(timings)]:
+                by_day[day].append(f"{hour:02d}:00 - {hour + 1:02d}:00")
+            for day, pairs in by_day.items():
+                lines.append(f"{day}: {' '.join(pairs)}")
+    return "\n".join(lines)
+
+
+def _pdf_escape(s):
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def text_to_pdf(text, lines_per_page=55):
+    """
+    Minimal text-only PDF (Helvetica, one line per text line) so /api/upload
+    can be exercised without shipping sample files.
+    """
+    lines = text.split("\n")
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = []  # index i -> object number i + 1
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(None)  # pages tree, filled in below
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_refs = []
+    for page_lines in pages:
+        ops = ["BT", "/F1 10 Tf", "12 TL", "40 800 Td"]
+        for line in page_lines:
+            ops.append(f"({_pdf_escape(line)}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_num = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_num
+        )
+        page_refs.append(len(objects))
+
+    kids = " ".join(f"{n} 0 R" for n in page_refs).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_refs)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def multipart_body(field, filename, content, content_type="application/pdf"):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+# ---------------- CLIENTS ----------------
+
+class ASGIClient:
+    """
+    Stand-in HTTP client that drives an ASGI app directly, so the whole
+    FastAPI stack (validation, middleware, threadpool for sync routes) runs
+    without a socket or an extra dependency.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method, path, body=b"", content_type="application/json"):
+        headers = [
+            (b"host", b"loadtest"),
+            (b"content-type", content_type.encode()),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 0),
+            "server": ("loadtest", 80),
+        }
+        request_sent = False
+        response_done = asyncio.Event()
+        status = None
+        chunks = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await response_done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    response_done.set()
+
+        await self.app(scope, receive, send)
+        return status, b"".join(chunks)
+
+
+class HTTPClient:
+    """
+    Talks to a running server (e.g. a local uvicorn) using urllib in worker threads.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def _blocking(self, method, path, body, content_type):
+        req = urllib.request.Request(self.base_url + path, data=body or None, method=method,
+                                     headers={"Content-Type": content_type})
+        try:
+            with urllib.request.urlopen(req, timeout=120) as resp:
+                return resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    async def request(self, method, path, body=b"", content_type="application/json"):
+        return await asyncio.to_thread(self._blocking, method, path, body, content_type)
+
+
+# ---------------- TRAFFIC ----------------
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)  # route -> seconds
+        self.errors = defaultdict(int)
+
+    async def call(self, client, route, payload=None, raw=None, content_type="application/json"):
+        body = raw if raw is not None else json.dumps(payload).encode()
+        start = time.perf_counter()
+        try:
+            status, data = await client.request("POST", route, body, content_type)
+        except Exception as e:
+            status, data = None, str(e).encode()
+        self.latencies[route].append(time.perf_counter() - start)
+        if status != 200:
+            self.errors[route] += 1
+            return None
+        return json.loads(data)
+
+
+async def virtual_student(client, recorder, rnd, catalog_text, catalog_pdf, args):
+    scale = args.time_scale
+
+    async def think(ms):
+        await asyncio.sleep(ms * scale / 1000)
+
+    await think(rnd.uniform(0, args.ramp_ms))
+
+    # 1. Upload
+    if rnd.random() < args.pdf_ratio:
+        body, ctype = multipart_body("file", "enrollment.pdf", catalog_pdf)
+        res = await recorder.call(client, "/api/upload", raw=body, content_type=ctype)
+    else:
+        res = await recorder.call(client, "/api/upload-text", {"text": catalog_text})
+    if not res or not res.get("courses"):
+        return
+    courses = res["courses"]
+    subjects = sorted({c["course_name"] for c in courses})
+
+    # 2. Debounced selection edits, the way App.jsx fires compatibility checks
+    selected, leave_day, preferred = [], rnd.choice(DAYS), {}
+    for _ in range(rnd.randint(args.min_edits, args.max_edits)):
+        r = rnd.random()
+        if r < 0.75 or not selected:
+            cand = [s for s in subjects if s not in selected]
+            if cand:
+                selected.append(rnd.choice(cand))
+        elif r < 0.85:
+            selected.remove(rnd.choice(selected))
+        elif r < 0.95:
+            leave_day = rnd.choice(DAYS)
+        else:
+            subj = rnd.choice(selected)
+            faculties = sorted({c["faculty"] for c in courses if c["course_name"] == subj})
+            preferred[subj] = rnd.choice(faculties)
+
+        gap = rnd.expovariate(1 / args.edit_gap_ms)
+        if gap >= DEBOUNCE_MS:
+            # Input went idle long enough for the debounced check to fire
+            await think(DEBOUNCE_MS)
+            await recorder.call(client, "/api/check-compatibility", {
+                "selected_subjects": selected, "courses_data": courses,
+                "leave_day": leave_day, "preferred_faculties": preferred
+            })
+            await think(gap - DEBOUNCE_MS)
+        else:
+            await think(gap)
+
+    # 3. Generate
+    await recorder.call(client, "/api/generate", {
+        "selected_subjects": selected, "courses_data": courses,
+        "leave_day": leave_day, "preferred_faculties": preferred
+    })
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(recorder, wall):
+    routes = {}
+    total = 0
+    for route, lat in sorted(recorder.latencies.items()):
+        lat = sorted(lat)
+        total += len(lat)
+        routes[route] = {
+            "requests": len(lat),
+            "errors": recorder.errors[route],
+            "error_rate": recorder.errors[route] / len(lat),
+            "mean_ms": statistics.mean(lat) * 1000,
+            "p50_ms": _percentile(lat, 50) * 1000,
+            "p95_ms": _percentile(lat, 95) * 1000,
+            "p99_ms": _percentile(lat, 99) * 1000,
+        }
+    return {"wall_s": wall, "requests": total, "throughput_rps": total / wall if wall else 0.0, "routes": routes}
+
+
+def print_report(report):
+    print(f"\n{report['requests']} requests in {report['wall_s']:.2f}s "
+          f"({report['throughput_rps']:.1f} req/s)\n")
+    print(f"{'route':<28}{'n':>6}{'err%':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, r in report["routes"].items():
+        print(f"{route:<28}{r['requests']:>6}{r['error_rate'] * 100:>6.1f}%"
+              f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """
+    Returns a list of human-readable regressions (empty if none).
+    """
+    regressions = []
+    for route, base in baseline["routes"].items():
+        cur = report["routes"].get(route)
+        if cur is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if cur[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{route} {metric}: {base[metric]:.1f} -> {cur[metric]:.1f}")
+        if cur["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{route} error_rate: {base['error_rate']:.2%} -> {cur['error_rate']:.2%}")
+    return regressions
+
+
+async def run(args):
+    if args.url:
+        client = HTTPClient(args.url)
+    else:
+        from backend.main import app
+        client = ASGIClient(app)
+
+    # A handful of popular PDFs shared by many students, like a real release day
+    catalogs = []
+    for i in range(args.catalogs):
+        text = synthetic_catalog_text(args.seed + i, args.courses, args.sections)
+        catalogs.append((text, text_to_pdf(text)))
+
+    recorder = Recorder()
+    rnd = random.Random(args.seed)
+    tasks = []
+    for _ in range(args.users):
+        text, pdf = rnd.choice(catalogs)
+        tasks.append(virtual_student(client, recorder, random.Random(rnd.random()), text, pdf, args))
+
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    return summarize(recorder, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the PlanWizz API locally.")
+    parser.add_argument("--url", help="Base URL of a running server; default drives backend.main:app in-process")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--catalogs", type=int, default=2, help="Distinct enrollment PDFs in circulation")
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--sections", type=int, default=4)
+    parser.add_argument("--pdf-ratio", type=float, default=0.5, help="Share of users uploading a PDF vs pasting text")
+    parser.add_argument("--min-edits", type=int, default=3)
+    parser.add_argument("--max-edits", type=int, default=8)
+    parser.add_argument("--edit-gap-ms", type=float, default=700, help="Mean gap between selection edits")
+    parser.add_argument("--ramp-ms", type=float, default=2000, help="Users start uniformly within this window")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Multiply all think times (0 = no waits)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save-baseline", help="Write the report to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a saved report; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed latency growth vs baseline")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions vs baseline:")
+            for r in regressions:
+                print(f"  {r}")
+            sys.exit(1)
+        print("\nNo regressions vs baseline.")
+
+
+if __name__ == "__main__":
+    main()
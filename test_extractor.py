@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from backend.extractor import courses_json, extract_courses_from_text, extract_segments_from_text
+from load_test import synthetic_catalog_text
+
+NEW_FORMAT_SAMPLE = """23ME101 [3 Credits]
+PROFESSIONAL CORE
+Course overview
+Engineering Mechanics
+UG - 08, T1-B13, MECH - MUTHUKUMAR V
+Monday: 08:00 - 09:00 10:00 - 11:00
+Wednesday: 13:00 - 14:00 17:00 - 18:00
+PHASE II
+Friday: 09:00 - 10:00
+UG - 25, T1-G9, ENGLISH - Saranya \"V\"
+Tuesday: 11:00 - 12:00"""
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_courses_json_matches_dict_output(seed):
+    text = synthetic_catalog_text(seed)
+    assert json.loads(courses_json(extract_segments_from_text(text))) == {
+        "courses": extract_courses_from_text(text)
+    }
+
+
+def test_courses_json_new_format_and_escaping():
+    courses = json.loads(courses_json(extract_segments_from_text(NEW_FORMAT_SAMPLE)))["courses"]
+    assert courses == extract_courses_from_text(NEW_FORMAT_SAMPLE)
+    # 17:00 - 18:00 is outside the valid window and the PHASE block is skipped
+    assert len(courses) == 4
+    assert courses[-1]["faculty"] == 'Saranya "V"'
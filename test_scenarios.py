@@ -0,0 +1,96 @@
+import json
+import random
+from types import SimpleNamespace
+
+from backend.scenarios import ScenarioSolver
+from backend.solver import TimetableCSP
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+
+def _segment(subject, slot, faculty, day, start, end):
+    return {
+        "course_name": subject, "course_code": "23XX000", "credits": "3",
+        "faculty": faculty, "slot": slot, "day": day,
+        "start_time": start, "end_time": end,
+    }
+
+
+def random_catalog(seed, n_subjects=10, n_options=3):
+    rnd = random.Random(seed)
+    rows = []
+    for s in range(n_subjects):
+        for o in range(n_options):
+            faculty = f"FAC{rnd.randint(1, 6)}"
+            for _ in range(rnd.randint(1, 3)):
+                hour = rnd.randint(8, 16)
+                rows.append(_segment(f"SUBJ{s}", f"T{o}", faculty, rnd.choice(DAYS),
+                                     f"{hour:02d}:00", f"{hour + 1:02d}:00"))
+    return rows
+
+
+def scenario(subjects, leave_day="", preferred=None, limits=None, name=None):
+    return SimpleNamespace(name=name, selected_subjects=subjects, leave_day=leave_day,
+                           preferred_faculties=preferred or {}, faculty_constraints=limits or {})
+
+
+def test_batch_results_match_independent_solves():
+    for seed in range(30):
+        rnd = random.Random(seed)
+        courses = random_catalog(seed, n_options=rnd.choice([2, 4]))
+        variants = []
+        for _ in range(20):
+            subjects = rnd.sample([f"SUBJ{i}" for i in range(10)], rnd.randint(1, 7))
+            variants.append(scenario(
+                subjects,
+                leave_day=rnd.choice(DAYS + [""]),
+                preferred={subjects[0]: "FAC2"} if rnd.random() < 0.3 else {},
+                limits=rnd.choice([{}, {"max_classes_per_day": 2}]),
+            ))
+
+        batch = ScenarioSolver(courses).solve_all(variants)
+
+        for variant, result in zip(variants, batch["results"]):
+            expected = TimetableCSP(variant.selected_subjects, courses, variant.leave_day,
+                                    variant.preferred_faculties, variant.faculty_constraints).solve()
+            assert json.dumps(result, sort_keys=True) == json.dumps(expected, sort_keys=True)
+
+
+def test_nogoods_prune_superset_bundles():
+    courses = [
+        # A and B only ever meet at the same time
+        _segment("A", "T1", "X", "Monday", "09:00", "10:00"),
+        _segment("B", "T1", "Y", "Monday", "09:00", "10:00"),
+        _segment("C", "T1", "Z", "Tuesday", "09:00", "10:00"),
+    ]
+    batch = ScenarioSolver(courses).solve_all([
+        scenario(["A", "B", "C"]),
+        scenario(["A", "B"]),
+    ])
+
+    # The pair is solved first; its nogood skips the strict search for the superset
+    assert batch["stats"]["pruned"] > 0
+    assert batch["results"][1]["status"] == "conflict"
+
+
+def test_bad_row_only_fails_variants_that_select_it():
+    courses = [
+        _segment("A", "T1", "X", "Monday", "09:00", "10:00"),
+        _segment("OTHER", "T1", "Y", "Monday", "10am", "11:00"),
+    ]
+    batch = ScenarioSolver(courses).solve_all([scenario(["A"]), scenario(["A", "OTHER"])])
+
+    assert batch["results"][0]["status"] == "success"
+    assert batch["results"][1]["status"] == "error"
+    assert "10am" in batch["results"][1]["reason"]
+
+
+def test_comparison_orders_times_numerically():
+    courses = [
+        _segment("A", "T1", "X", "Monday", "9:00", "9:50"),
+        _segment("B", "T1", "Y", "Monday", "10:00", "11:00"),
+    ]
+    row = ScenarioSolver(courses).solve_all([scenario(["A", "B"])])["comparison"][0]
+
+    assert row["earliest_start"] == "09:00"
+    assert row["latest_end"] == "11:00"
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from backend.singleflight import SingleFlight, request_key
+
+
+def _run_concurrently(flight, key, fn, n=8):
+    results, errors = [], []
+    started = threading.Barrier(n)
+
+    def worker():
+        started.wait()
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_callers_share_one_result():
+    flight = SingleFlight()
+    calls = []
+
+    def solve():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"status": "success"}
+
+    results, errors = _run_concurrently(flight, "k", solve)
+
+    assert len(calls) == 1
+    assert not errors
+    assert len(results) == 8 and all(r is results[0] for r in results)
+
+    stats = flight.stats()
+    assert stats["requests"] == 8
+    assert stats["executed"] == 1
+    assert stats["shared"] == 7
+    assert stats["errors"] == 0
+    assert stats["max_waiters"] == 7
+
+
+def test_concurrent_callers_share_one_exception():
+    flight = SingleFlight()
+    calls = []
+
+    def solve():
+        calls.append(1)
+        time.sleep(0.2)
+        raise ValueError("bad catalog")
+
+    results, errors = _run_concurrently(flight, "k", solve)
+
+    assert len(calls) == 1
+    assert not results
+    assert len(errors) == 8 and all(isinstance(e, ValueError) for e in errors)
+    assert flight.stats()["errors"] == 1
+
+
+def test_key_is_released_after_completion():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == 1
+    assert flight.stats()["in_flight"] == 0
+    # Nothing is cached: the next call recomputes
+    assert flight.do("k", lambda: 2) == 2
+
+    try:
+        flight.do("k", lambda: 1 / 0)
+    except ZeroDivisionError:
+        pass
+    assert flight.stats()["in_flight"] == 0
+    assert flight.do("k", lambda: 3) == 3
+    assert flight.stats()["executed"] == 4
+
+
+def test_request_key_hashes_raw_body():
+    body = b'{"courses_data": [], "selected_subjects": ["A", "B"]}'
+    assert request_key(body) == request_key(bytes(body))
+    assert request_key(body) != request_key(body.replace(b'"A", "B"', b'"B", "A"'))
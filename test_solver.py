@@ -0,0 +1,142 @@
+import random
+from collections import defaultdict
+
+from backend.solver import TimetableCSP
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+
+def _segment(subject, slot, faculty, day, hour):
+    return {
+        "course_name": subject, "course_code": "23XX000", "credits": "3",
+        "faculty": faculty, "slot": slot, "day": day,
+        "start_time": f"{hour:02d}:00", "end_time": f"{hour + 1:02d}:00",
+    }
+
+
+def random_catalog(seed, n_subjects=7, n_options=4, n_faculties=5):
+    rnd = random.Random(seed)
+    rows = []
+    for s in range(n_subjects):
+        for o in range(n_options):
+            faculty = f"FAC{rnd.randint(1, n_faculties)}"
+            for day, hour in {(rnd.choice(DAYS), rnd.randint(8, 16)) for _ in range(rnd.randint(1, 3))}:
+                rows.append(_segment(f"SUBJ{s}", f"T{o}", faculty, day, hour))
+    return rows
+
+
+def shared_timing_catalog(seed, n_subjects=10, timings=3, sections=6):
+    """Several sections per subject share one timing and differ only by faculty."""
+    rnd = random.Random(seed)
+    rows = []
+    for s in range(n_subjects):
+        for t in range(timings):
+            times = {(rnd.choice(DAYS[:5]), rnd.randint(8, 16)) for _ in range(2)}
+            for k in range(sections):
+                for day, hour in times:
+                    rows.append(_segment(f"S{s}", f"T{t}-{k}", f"F{s}_{t}_{k}", day, hour))
+    return rows
+
+
+def reference_solvable(subjects, courses_data, leave_day, limits):
+    """Plain backtracking over every (slot, faculty) option, as before the rewrite."""
+    options = defaultdict(lambda: defaultdict(list))
+    for c in courses_data:
+        options[c["course_name"]][(c["slot"], c["faculty"])].append(c)
+    domains = {
+        s: [segs for segs in options[s].values() if all(seg["day"] != leave_day for seg in segs)]
+        for s in subjects
+    }
+    counter = {"nodes": 0}
+
+    def fits(value, chosen):
+        booked = [seg for segs in chosen for seg in segs]
+        for new in value:
+            for old in booked:
+                if new["day"] == old["day"] and new["start_time"] < old["end_time"] and old["start_time"] < new["end_time"]:
+                    return False
+        faculty = value[0]["faculty"]
+        same = [segs for segs in chosen if segs[0]["faculty"] == faculty]
+        if limits.get("max_subjects_per_faculty") and len(same) >= limits["max_subjects_per_faculty"]:
+            return False
+        if limits.get("max_classes_per_day"):
+            for day in {seg["day"] for seg in value}:
+                load = sum(1 for segs in same + [value] for seg in segs if seg["day"] == day)
+                if load > limits["max_classes_per_day"]:
+                    return False
+        return True
+
+    def search(i, chosen):
+        if i == len(subjects):
+            return True
+        counter["nodes"] += 1
+        for value in domains[subjects[i]]:
+            if fits(value, chosen) and search(i + 1, chosen + [value]):
+                return True
+        return False
+
+    return search(0, []), counter["nodes"]
+
+
+def test_feasibility_matches_plain_search():
+    for seed in range(200):
+        rnd = random.Random(seed)
+        courses = random_catalog(seed)
+        subjects = rnd.sample([f"SUBJ{i}" for i in range(7)], rnd.randint(2, 6))
+        leave_day = rnd.choice(DAYS + [""])
+        limits = rnd.choice([{}, {"max_subjects_per_faculty": 1}, {"max_classes_per_day": 1}])
+
+        solver = TimetableCSP(subjects, courses, leave_day, {}, limits)
+        expected, _ = reference_solvable(subjects, courses, leave_day, limits)
+        assert solver.is_solvable() == expected, (seed, subjects, leave_day, limits)
+
+
+def test_solution_respects_faculty_limits():
+    for seed in range(50):
+        courses = random_catalog(seed)
+        subjects = [f"SUBJ{i}" for i in range(5)]
+        result = TimetableCSP(subjects, courses, "", {}, {"max_subjects_per_faculty": 1}).solve()
+        if result["status"] == "success":
+            faculties = {}
+            for entry in result["timetable"]:
+                faculties.setdefault(entry["course_name"], entry["faculty"])
+            assert len(set(faculties.values())) == len(faculties)
+
+
+def test_shared_timings_shrink_search_tree():
+    subjects = [f"S{i}" for i in range(10)]
+    for seed in (0, 1):
+        courses = shared_timing_catalog(seed)
+        solver = TimetableCSP(subjects, courses, "", {})
+        expected, reference_nodes = reference_solvable(subjects, courses, "", {})
+        assert solver.is_solvable() == expected
+        assert reference_nodes >= 1000
+        assert solver.nodes_explored * 100 <= reference_nodes
+
+
+def test_faculty_limits_prune_during_search():
+    # Every subject is taught by the same faculty in 4 disjoint timings, so
+    # max_subjects_per_faculty=1 makes any pair infeasible. The search must
+    # notice at depth 2 instead of enumerating every timing combination first.
+    for n in (8, 10):
+        courses = [
+            _segment(f"S{s}", f"T{t}", "ONLY FACULTY", DAYS[t], 8 + s)
+            for s in range(n) for t in range(4)
+        ]
+        solver = TimetableCSP([f"S{s}" for s in range(n)], courses, "", {}, {"max_subjects_per_faculty": 1})
+        assert not solver.is_solvable()
+        assert solver.nodes_explored <= 4 * n
+
+
+def test_conflict_caused_only_by_faculty_limit_is_reported():
+    courses = [
+        _segment(f"S{s}", "T1", "ONLY", day, 8 + s)
+        for s in range(3) for day in DAYS[:4]
+    ]
+    result = TimetableCSP(["S0", "S1", "S2"], courses, "Saturday", {}, {"max_subjects_per_faculty": 1}).solve()
+
+    assert result["status"] == "conflict"
+    assert result["conflict_details"][0]["type"] == "faculty_limit"
+    assert result["conflict_details"][0]["limits"] == {"max_subjects_per_faculty": 1}
+    assert "Saturday" not in result["suggestion"]
+    assert "faculty limits" in result["suggestion"]